@@ -3,19 +3,42 @@ Walmart Cart Optimizer - Streamlit Application
 Main entry point for the AI-powered shopping cart payment optimizer.
 """
 
-import os
+from __future__ import annotations
+
+import io
 import sys
 from pathlib import Path
-from datetime import datetime
 
+import pandas as pd
 import streamlit as st
-from PIL import Image
+
+# Vision budget: cap the long edge of uploads before detection/OCR.
+# Models run at much lower internal resolution, so anything beyond this
+# only costs decode time, disk I/O, and model preprocessing.
+MAX_SIDE = 1600
+
+# Hard cap on upload size, mirrored by server.maxUploadSize in
+# .streamlit/config.toml. Streamlit buffers the whole file in memory
+# before our code sees it, so this protects the process from OOM.
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+# Manual-entry constants, hoisted so reruns don't rebuild them
+_CATEGORIES = ("Electronics", "Groceries", "Baby & Kids", "Health & Beauty",
+               "Household", "Clothing", "Sports", "Furniture")
+_QUICK_ITEMS = (
+    ("🍌 Bananas", 1.49, "Groceries"),
+    ("🥛 Milk", 3.89, "Groceries"),
+    ("👶 Diapers", 24.99, "Baby & Kids"),
+    ("🎧 AirPods", 149.99, "Electronics"),
+    ("📺 TV", 399.99, "Electronics"),
+    ("🧥 Jacket", 49.99, "Clothing"),
+)
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from vision_engine import CartVisionEngine, DetectedItem
-from ocr_processor import ReceiptOCRProcessor, ReceiptData
+# vision_engine/ocr_processor pull in torch and cv2; defer those to
+# init_components (cached) so they stay off the first-render path
 from walmart_api import WalmartMockAPI
 from finance_brain import FinanceBrainAgent, CartItem, create_cart_items
 
@@ -27,106 +50,51 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for premium look
-st.markdown("""
-<style>
-    /* Main container */
-    .main {
-        background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
-    }
-    
-    /* Headers */
-    h1, h2, h3 {
-        background: linear-gradient(90deg, #00d4ff, #7c3aed);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }
-    
-    /* Cards */
-    .stMetric {
-        background: rgba(255, 255, 255, 0.05);
-        border-radius: 12px;
-        padding: 16px;
-        border: 1px solid rgba(255, 255, 255, 0.1);
-    }
-    
-    /* Success/Warning boxes */
-    .pay-now-box {
-        background: linear-gradient(135deg, #059669 0%, #047857 100%);
-        padding: 20px;
-        border-radius: 12px;
-        margin: 10px 0;
-        color: white;
-    }
-    
-    .bnpl-box {
-        background: linear-gradient(135deg, #7c3aed 0%, #6366f1 100%);
-        padding: 20px;
-        border-radius: 12px;
-        margin: 10px 0;
-        color: white;
-    }
-    
-    .warning-box {
-        background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
-        padding: 15px;
-        border-radius: 12px;
-        margin: 10px 0;
-        color: white;
-    }
-    
-    /* Sidebar */
-    .css-1d391kg {
-        background: rgba(26, 26, 46, 0.95);
-    }
-    
-    /* Buttons */
-    .stButton>button {
-        background: linear-gradient(90deg, #00d4ff, #7c3aed);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 12px 24px;
-        font-weight: 600;
-        transition: transform 0.2s;
-    }
-    
-    .stButton>button:hover {
-        transform: translateY(-2px);
-    }
-    
-    /* File uploader */
-    .stFileUploader {
-        border: 2px dashed rgba(124, 58, 237, 0.5);
-        border-radius: 12px;
-        padding: 20px;
-    }
-    
-    /* Item cards */
-    .item-card {
-        background: rgba(255, 255, 255, 0.05);
-        padding: 15px;
-        border-radius: 10px;
-        margin: 8px 0;
-        border-left: 4px solid #7c3aed;
-    }
-    
-    /* Timeline */
-    .timeline-item {
-        border-left: 3px solid #7c3aed;
-        padding-left: 20px;
-        margin-left: 10px;
-        padding-bottom: 20px;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for premium look, kept in a static file so the browser-side
+# payload is read once per process instead of rebuilt on every rerun
+@st.cache_data
+def _load_css() -> str:
+    """Read the app stylesheet once per process."""
+    return (Path(__file__).parent / "assets" / "style.css").read_text()
+
+
+st.markdown(f"<style>{_load_css()}</style>", unsafe_allow_html=True)
+
+
+def _prepare_for_processing(uploaded) -> io.BytesIO:
+    """
+    Stage an uploaded image for the vision/OCR engines as an in-memory
+    buffer, downscaling to the MAX_SIDE budget when the upload exceeds it.
+
+    Within-budget images are passed through untouched (PIL only reads the
+    header to check dimensions); oversized ones are resized with bilinear
+    filtering, which is ~3x faster than Lanczos and plenty for
+    detection/OCR. Nothing ever touches disk.
+    """
+    from PIL import Image
+
+    img = Image.open(uploaded)
+
+    if max(img.size) > MAX_SIDE:
+        img.thumbnail((MAX_SIDE, MAX_SIDE), Image.BILINEAR)
+        buf = io.BytesIO()
+        img.convert("RGB").save(buf, "JPEG", quality=85, optimize=False)
+        buf.seek(0)
+    else:
+        uploaded.seek(0)
+        buf = io.BytesIO(uploaded.read())
+
+    uploaded.seek(0)
+    return buf
 
 
 # Initialize components (cached)
 @st.cache_resource
 def init_components():
     """Initialize all components."""
+    from vision_engine import CartVisionEngine
+    from ocr_processor import ReceiptOCRProcessor
+
     vision = CartVisionEngine()
     ocr = ReceiptOCRProcessor(engine="mock")  # Use mock for demo
     api = WalmartMockAPI()
@@ -134,6 +102,133 @@ def init_components():
     return vision, ocr, api, brain
 
 
+@st.cache_data(show_spinner=False)
+def _detect_cached(file_bytes: bytes):
+    """Run cart detection on raw upload bytes, cached across reruns."""
+    vision = init_components()[0]
+    return vision.detect_items(_prepare_for_processing(io.BytesIO(file_bytes)))
+
+
+@st.cache_data(show_spinner=False)
+def _ocr_cached(file_bytes: bytes):
+    """Parse a receipt from raw upload bytes, cached across reruns."""
+    ocr = init_components()[1]
+    return ocr.parse_receipt(_prepare_for_processing(io.BytesIO(file_bytes)))
+
+
+@st.cache_data
+def _user_list():
+    """List user profiles once per process (static demo data)."""
+    return init_components()[3].list_users()
+
+
+@st.cache_data(ttl=60)
+def _finances(user_id: str):
+    """Cache the per-user financial summary between reruns."""
+    return init_components()[3].calculate_available_funds(user_id)
+
+
+@st.fragment
+def _optimization_panel(brain, user_id: str):
+    """
+    Render the payment-optimization panel.
+
+    Runs as a fragment so Optimize clicks rerun only this block
+    instead of the whole script (including the vision/OCR tabs).
+    """
+    st.header("💡 Payment Optimization")
+
+    if st.button("🔮 Optimize My Payments", type="primary", use_container_width=True):
+        with st.spinner("Analyzing your finances and cart..."):
+            result = brain.optimize_cart(user_id, st.session_state['cart_items'])
+
+        st.session_state['optimization_result'] = result
+
+    if 'optimization_result' not in st.session_state:
+        return
+
+    result = st.session_state['optimization_result']
+
+    # Summary
+    st.markdown(f"""
+    <div style="background: linear-gradient(135deg, rgba(124, 58, 237, 0.2), rgba(0, 212, 255, 0.2)); 
+                padding: 25px; border-radius: 15px; margin: 20px 0;">
+        {result.summary.replace(chr(10), '<br>')}
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Warnings
+    for warning in result.warnings:
+        st.markdown(f"""
+        <div class="warning-box">
+            {warning}
+        </div>
+        """, unsafe_allow_html=True)
+
+    # Payment breakdown
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown("""
+        <div class="pay-now-box">
+            <h3 style="color: white; margin: 0;">💳 Pay Now</h3>
+        </div>
+        """, unsafe_allow_html=True)
+
+        if result.pay_now_items:
+            st.markdown("  \n".join(
+                f"• **{item.name}** - ${item.price:.2f}"
+                for item in result.pay_now_items
+            ))
+            st.metric("Pay Now Total", f"${result.pay_now_total:.2f}")
+        else:
+            st.info("No items to pay now")
+
+    with col2:
+        st.markdown("""
+        <div class="bnpl-box">
+            <h3 style="color: white; margin: 0;">📅 Buy Now, Pay Later</h3>
+        </div>
+        """, unsafe_allow_html=True)
+
+        if result.bnpl_items:
+            st.markdown("  \n".join(
+                f"• **{item.name}** - ${item.price:.2f}"
+                for item in result.bnpl_items
+            ))
+            st.metric("BNPL Total", f"${result.bnpl_total:.2f}")
+            st.caption(f"4 payments of ${result.monthly_bnpl_payment:.2f} every 2 weeks")
+        else:
+            st.info("No items for BNPL")
+
+    # Payment calendar
+    st.markdown("---")
+    st.subheader("📅 Payment Calendar")
+
+    calendar = brain.get_payment_calendar(result, user_id)
+
+    # One Arrow-encoded payload instead of per-event HTML blocks
+    df = pd.DataFrame(calendar[:8])[['date', 'type', 'description', 'amount']]
+    st.dataframe(
+        df.style.map(
+            lambda v: 'color: #059669' if v > 0 else 'color: #dc2626',
+            subset=['amount'],
+        ).format({'amount': '${:,.2f}'}),
+        hide_index=True,
+        use_container_width=True,
+    )
+
+    # Final balance
+    st.markdown("---")
+    balance_color = "#059669" if result.projected_balance > 100 else "#dc2626"
+    st.markdown(f"""
+    <div style="text-align: center; padding: 20px;">
+        <h2>Projected Balance After Purchase</h2>
+        <h1 style="color: {balance_color}; font-size: 48px;">${result.projected_balance:.2f}</h1>
+    </div>
+    """, unsafe_allow_html=True)
+
+
 def main():
     """Main application."""
     
@@ -148,7 +243,7 @@ def main():
     with st.sidebar:
         st.header("👤 User Profile")
         
-        users = brain.list_users()
+        users = _user_list()
         user_options = {f"{u['name']} (${u['balance']:.0f})": u['id'] for u in users}
         
         selected_user_display = st.selectbox(
@@ -160,7 +255,7 @@ def main():
         
         # Show user financial summary
         user = brain.get_user(selected_user_id)
-        finances = brain.calculate_available_funds(selected_user_id)
+        finances = _finances(selected_user_id)
         
         st.markdown("---")
         st.subheader("💰 Financial Summary")
@@ -194,59 +289,74 @@ def main():
             type=["jpg", "jpeg", "png"],
             key="cart_upload"
         )
-        
+        st.caption(f"Images are analyzed at up to {MAX_SIDE}px on the long edge.")
+
+        if uploaded_cart and uploaded_cart.size > MAX_UPLOAD_BYTES:
+            st.error("Image is too large (max 10MB). Please upload a smaller photo.")
+            st.stop()
+
         if uploaded_cart:
             col1, col2 = st.columns([1, 1])
             
             with col1:
                 st.subheader("📷 Your Cart")
-                image = Image.open(uploaded_cart)
-                st.image(image, use_container_width=True)
-            
+                st.image(uploaded_cart, use_container_width=True)
+
             with col2:
                 st.subheader("🔍 Detected Items")
-                
-                with st.spinner("Analyzing cart with AI..."):
-                    # Save temp file for processing
-                    temp_path = f"/tmp/cart_{datetime.now().timestamp()}.jpg"
-                    image.save(temp_path)
-                    
-                    # Detect items
-                    detected = vision.detect_items(temp_path)
+
+                # Vision runs only on an explicit click, not on every
+                # unrelated widget interaction; results live in session
+                # state and are rendered from there on later reruns
+                cart_key = (uploaded_cart.name, uploaded_cart.size)
+                if st.button("🔍 Analyze Cart", key="run_vision"):
+                    with st.spinner("Analyzing cart with AI..."):
+                        st.session_state['detected'] = _detect_cached(uploaded_cart.getvalue())
+                        st.session_state['detected_for'] = cart_key
+
+                detected = (
+                    st.session_state.get('detected')
+                    if st.session_state.get('detected_for') == cart_key
+                    else None
+                )
+                if detected is not None and not detected:
+                    st.warning("No items detected. Try a clearer image or use Manual Entry.")
+                elif detected:
                     summary = vision.get_cart_summary(detected)
-                    
-                    # Clean up
-                    os.remove(temp_path)
-                
-                if detected:
-                    for item in detected:
-                        st.markdown(f"""
+                    # One markdown call (= one websocket frame) for all cards
+                    cards = "".join(
+                        f"""
                         <div class="item-card">
                             <strong>{item.name}</strong><br>
-                            <small>{item.category}</small> • 
+                            <small>{item.category}</small> •
                             <strong>${item.estimated_price:.2f}</strong>
                             <small style="color: #888;">({item.confidence:.0%} conf)</small>
                         </div>
-                        """, unsafe_allow_html=True)
-                    
+                        """
+                        for item in detected
+                    )
+                    st.markdown(cards, unsafe_allow_html=True)
+
                     st.metric("Estimated Total", f"${summary['estimated_total']:.2f}")
-                    
-                    # Convert to CartItems for optimization
-                    cart_items = []
-                    for item in detected:
-                        # Check BNPL eligibility via API
-                        bnpl_eligible = api.is_bnpl_eligible(item.name)
-                        cart_items.append(CartItem(
-                            name=item.name,
-                            price=item.estimated_price,
-                            category=item.category,
-                            bnpl_eligible=bnpl_eligible
-                        ))
-                    
-                    st.session_state['cart_items'] = cart_items
-                    st.session_state['cart_source'] = 'vision'
-                else:
-                    st.warning("No items detected. Try a clearer image or use Manual Entry.")
+
+                    # Convert to CartItems for optimization, skipping the
+                    # rebuild (and its API lookups) when content is unchanged
+                    sig = hash(tuple((i.name, i.estimated_price) for i in detected))
+                    if st.session_state.get('cart_sig') != sig:
+                        # one batched API call instead of one per item
+                        lookups = api.bulk_lookup([item.name for item in detected])
+                        cart_items = []
+                        for item in detected:
+                            cart_items.append(CartItem(
+                                name=item.name,
+                                price=item.estimated_price,
+                                category=item.category,
+                                bnpl_eligible=lookups[item.name][1]
+                            ))
+
+                        st.session_state['cart_items'] = cart_items
+                        st.session_state['cart_sig'] = sig
+                        st.session_state['cart_source'] = 'vision'
     
     # ==================== TAB 2: Receipt Reader ====================
     with tab2:
@@ -258,44 +368,57 @@ def main():
             type=["jpg", "jpeg", "png"],
             key="receipt_upload"
         )
-        
+        st.caption(f"Images are analyzed at up to {MAX_SIDE}px on the long edge.")
+
+        if uploaded_receipt and uploaded_receipt.size > MAX_UPLOAD_BYTES:
+            st.error("Image is too large (max 10MB). Please upload a smaller photo.")
+            st.stop()
+
         if uploaded_receipt:
             col1, col2 = st.columns([1, 1])
             
             with col1:
                 st.subheader("🧾 Receipt")
-                image = Image.open(uploaded_receipt)
-                st.image(image, use_container_width=True)
-            
+                st.image(uploaded_receipt, use_container_width=True)
+
             with col2:
                 st.subheader("📝 Extracted Items")
-                
-                with st.spinner("Reading receipt with OCR..."):
-                    # Save temp file
-                    temp_path = f"/tmp/receipt_{datetime.now().timestamp()}.jpg"
-                    image.save(temp_path)
-                    
-                    # Process receipt
-                    receipt = ocr.parse_receipt(temp_path)
-                    summary = ocr.get_receipt_summary(receipt)
-                    
-                    os.remove(temp_path)
-                
-                if receipt.items:
+
+                # OCR runs only on an explicit click, not on every
+                # unrelated widget interaction; results live in session
+                # state and are rendered from there on later reruns
+                receipt_key = (uploaded_receipt.name, uploaded_receipt.size)
+                if st.button("📝 Read Receipt", key="run_ocr"):
+                    with st.spinner("Reading receipt with OCR..."):
+                        st.session_state['receipt'] = _ocr_cached(uploaded_receipt.getvalue())
+                        st.session_state['receipt_for'] = receipt_key
+
+                receipt = (
+                    st.session_state.get('receipt')
+                    if st.session_state.get('receipt_for') == receipt_key
+                    else None
+                )
+                if receipt and receipt.items:
                     st.text(f"Store: {receipt.store_name}")
                     st.text(f"Date: {receipt.date}")
                     st.markdown("---")
-                    
-                    for item in receipt.items:
-                        category = api.get_category(item.name) or "General"
-                        st.markdown(f"""
+
+                    # One batched API call for every item on the receipt
+                    lookups = api.bulk_lookup([item.name for item in receipt.items])
+
+                    # One markdown call (= one websocket frame) for all cards
+                    cards = "".join(
+                        f"""
                         <div class="item-card">
                             <strong>{item.name}</strong><br>
-                            <small>{category}</small> • 
+                            <small>{lookups[item.name][0] or "General"}</small> •
                             <strong>${item.price:.2f}</strong>
                         </div>
-                        """, unsafe_allow_html=True)
-                    
+                        """
+                        for item in receipt.items
+                    )
+                    st.markdown(cards, unsafe_allow_html=True)
+
                     st.markdown("---")
                     if receipt.subtotal:
                         st.text(f"Subtotal: ${receipt.subtotal:.2f}")
@@ -304,192 +427,116 @@ def main():
                     if receipt.total:
                         st.metric("Total", f"${receipt.total:.2f}")
                     
-                    # Convert to CartItems
-                    cart_items = []
-                    for item in receipt.items:
-                        category = api.get_category(item.name) or "General"
-                        bnpl_eligible = api.is_bnpl_eligible(item.name)
-                        cart_items.append(CartItem(
-                            name=item.name,
-                            price=item.price,
-                            category=category,
-                            bnpl_eligible=bnpl_eligible
-                        ))
-                    
-                    st.session_state['cart_items'] = cart_items
-                    st.session_state['cart_source'] = 'receipt'
+                    # Convert to CartItems, skipping the rebuild when the
+                    # receipt content is unchanged
+                    sig = hash(tuple((i.name, i.price) for i in receipt.items))
+                    if st.session_state.get('cart_sig') != sig:
+                        cart_items = []
+                        for item in receipt.items:
+                            category, bnpl_eligible = lookups[item.name]
+                            cart_items.append(CartItem(
+                                name=item.name,
+                                price=item.price,
+                                category=category or "General",
+                                bnpl_eligible=bnpl_eligible
+                            ))
+
+                        st.session_state['cart_items'] = cart_items
+                        st.session_state['cart_sig'] = sig
+                        st.session_state['cart_source'] = 'receipt'
     
     # ==================== TAB 3: Manual Entry ====================
     with tab3:
         st.header("Manual Entry")
         st.markdown("Add items manually to your cart.")
         
-        # Initialize manual cart
-        if 'manual_cart' not in st.session_state:
-            st.session_state['manual_cart'] = []
-        
+        # Initialize manual cart (DataFrame-backed for st.data_editor)
+        if 'manual_cart_df' not in st.session_state:
+            st.session_state['manual_cart_df'] = pd.DataFrame(
+                columns=["name", "price", "category"]
+            )
+
+        def _append_to_cart(name: str, price: float, category: str):
+            """Append one row to the manual cart DataFrame."""
+            row = pd.DataFrame([{"name": name, "price": price, "category": category}])
+            st.session_state['manual_cart_df'] = pd.concat(
+                [st.session_state['manual_cart_df'], row], ignore_index=True
+            )
+
         col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
-        
+
         with col1:
             item_name = st.text_input("Item Name", placeholder="e.g., Apple AirPods")
         with col2:
             item_price = st.number_input("Price ($)", min_value=0.01, value=49.99, step=0.01)
         with col3:
-            categories = ["Electronics", "Groceries", "Baby & Kids", "Health & Beauty", 
-                         "Household", "Clothing", "Sports", "Furniture"]
-            item_category = st.selectbox("Category", categories)
+            item_category = st.selectbox("Category", _CATEGORIES)
         with col4:
             st.markdown("<br>", unsafe_allow_html=True)
             if st.button("➕ Add"):
                 if item_name:
-                    st.session_state['manual_cart'].append({
-                        "name": item_name,
-                        "price": item_price,
-                        "category": item_category
-                    })
+                    _append_to_cart(item_name, item_price, item_category)
         
         # Quick add common items
         st.markdown("**Quick Add:**")
-        quick_items = [
-            ("🍌 Bananas", 1.49, "Groceries"),
-            ("🥛 Milk", 3.89, "Groceries"),
-            ("👶 Diapers", 24.99, "Baby & Kids"),
-            ("🎧 AirPods", 149.99, "Electronics"),
-            ("📺 TV", 399.99, "Electronics"),
-            ("🧥 Jacket", 49.99, "Clothing"),
-        ]
-        
         cols = st.columns(6)
-        for i, (label, price, cat) in enumerate(quick_items):
+        for i, (label, price, cat) in enumerate(_QUICK_ITEMS):
             with cols[i]:
                 if st.button(label, key=f"quick_{i}"):
-                    st.session_state['manual_cart'].append({
-                        "name": label.split(" ", 1)[1],
-                        "price": price,
-                        "category": cat
-                    })
+                    _append_to_cart(label.split(" ", 1)[1], price, cat)
         
-        # Show current cart
-        if st.session_state['manual_cart']:
+        # Show current cart (single widget; rows can be edited or deleted in place)
+        if not st.session_state['manual_cart_df'].empty:
             st.markdown("---")
             st.subheader("🛒 Your Cart")
-            
-            total = 0
-            for i, item in enumerate(st.session_state['manual_cart']):
-                col1, col2, col3 = st.columns([4, 2, 1])
-                with col1:
-                    st.text(f"{item['name']} ({item['category']})")
-                with col2:
-                    st.text(f"${item['price']:.2f}")
-                with col3:
-                    if st.button("❌", key=f"del_{i}"):
-                        st.session_state['manual_cart'].pop(i)
-                        st.rerun()
-                total += item['price']
-            
+
+            edited = st.data_editor(
+                st.session_state['manual_cart_df'],
+                num_rows="dynamic",
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "name": st.column_config.TextColumn("Item"),
+                    "price": st.column_config.NumberColumn("Price ($)", format="%.2f"),
+                    "category": st.column_config.SelectboxColumn(
+                        "Category", options=_CATEGORIES
+                    ),
+                },
+            )
+            st.session_state['manual_cart_df'] = edited
+
+            # Ignore blank editor rows until they're filled in; default
+            # missing categories rather than propagating NaN downstream
+            valid = edited.dropna(subset=["name", "price"])
+            valid = valid.fillna({"category": "General"})
+
+            # Vectorized C-level reduce instead of a Python accumulator
+            total = float(valid['price'].sum())
+
             st.markdown("---")
             st.metric("Cart Total", f"${total:.2f}")
-            
-            # Convert to CartItems
-            cart_items = create_cart_items(st.session_state['manual_cart'])
-            for item in cart_items:
-                item.bnpl_eligible = api.is_bnpl_eligible(item.name)
-            
-            st.session_state['cart_items'] = cart_items
-            st.session_state['cart_source'] = 'manual'
+
+            # Convert to CartItems, skipping the rebuild when the cart
+            # content is unchanged
+            sig = hash(tuple(
+                (row.name, row.price, row.category)
+                for row in valid.itertuples(index=False)
+            ))
+            if st.session_state.get('cart_sig') != sig:
+                cart_items = create_cart_items(valid.to_dict("records"))
+                lookups = api.bulk_lookup([item.name for item in cart_items])
+                for item in cart_items:
+                    item.bnpl_eligible = lookups[item.name][1]
+
+                st.session_state['cart_items'] = cart_items
+                st.session_state['cart_sig'] = sig
+                st.session_state['cart_source'] = 'manual'
     
     # ==================== OPTIMIZATION SECTION ====================
     st.markdown("---")
     
     if 'cart_items' in st.session_state and st.session_state['cart_items']:
-        st.header("💡 Payment Optimization")
-        
-        if st.button("🔮 Optimize My Payments", type="primary", use_container_width=True):
-            with st.spinner("Analyzing your finances and cart..."):
-                result = brain.optimize_cart(selected_user_id, st.session_state['cart_items'])
-            
-            st.session_state['optimization_result'] = result
-        
-        if 'optimization_result' in st.session_state:
-            result = st.session_state['optimization_result']
-            
-            # Summary
-            st.markdown(f"""
-            <div style="background: linear-gradient(135deg, rgba(124, 58, 237, 0.2), rgba(0, 212, 255, 0.2)); 
-                        padding: 25px; border-radius: 15px; margin: 20px 0;">
-                {result.summary.replace(chr(10), '<br>')}
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Warnings
-            for warning in result.warnings:
-                st.markdown(f"""
-                <div class="warning-box">
-                    {warning}
-                </div>
-                """, unsafe_allow_html=True)
-            
-            # Payment breakdown
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("""
-                <div class="pay-now-box">
-                    <h3 style="color: white; margin: 0;">💳 Pay Now</h3>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                if result.pay_now_items:
-                    for item in result.pay_now_items:
-                        st.markdown(f"• **{item.name}** - ${item.price:.2f}")
-                    st.metric("Pay Now Total", f"${result.pay_now_total:.2f}")
-                else:
-                    st.info("No items to pay now")
-            
-            with col2:
-                st.markdown("""
-                <div class="bnpl-box">
-                    <h3 style="color: white; margin: 0;">📅 Buy Now, Pay Later</h3>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                if result.bnpl_items:
-                    for item in result.bnpl_items:
-                        st.markdown(f"• **{item.name}** - ${item.price:.2f}")
-                    st.metric("BNPL Total", f"${result.bnpl_total:.2f}")
-                    st.caption(f"4 payments of ${result.monthly_bnpl_payment:.2f} every 2 weeks")
-                else:
-                    st.info("No items for BNPL")
-            
-            # Payment calendar
-            st.markdown("---")
-            st.subheader("📅 Payment Calendar")
-            
-            calendar = brain.get_payment_calendar(result, selected_user_id)
-            
-            for event in calendar[:8]:
-                icon = "💳" if event['type'] == 'PAYMENT' else "📅" if event['type'] == 'BNPL_PAYMENT' else "📄" if event['type'] == 'BILL' else "💰"
-                color = "#059669" if event['type'] == 'INCOME' else "#dc2626" if event['type'] == 'BILL' else "#7c3aed"
-                
-                st.markdown(f"""
-                <div class="timeline-item">
-                    <strong>{event['date']}</strong> {icon}<br>
-                    {event['description']}<br>
-                    <span style="color: {color}; font-weight: bold;">
-                        {'+'if event['amount'] > 0 else ''}${event['amount']:.2f}
-                    </span>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            # Final balance
-            st.markdown("---")
-            balance_color = "#059669" if result.projected_balance > 100 else "#dc2626"
-            st.markdown(f"""
-            <div style="text-align: center; padding: 20px;">
-                <h2>Projected Balance After Purchase</h2>
-                <h1 style="color: {balance_color}; font-size: 48px;">${result.projected_balance:.2f}</h1>
-            </div>
-            """, unsafe_allow_html=True)
+        _optimization_panel(brain, selected_user_id)
     else:
         st.info("👆 Upload a cart photo, receipt, or add items manually to get started!")
     
@@ -3,16 +3,28 @@ Finance Brain Module - The Core BNPL Agent
 Analyzes user finances and proposes optimal payment strategies.
 """
 
+import bisect
+import functools
+import heapq
 import json
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass, field
+from typing import List, Dict, NamedTuple, Optional, Tuple
+from dataclasses import dataclass
 from pathlib import Path
 
-from dateutil.parser import parse as parse_date
+import numpy as np
+import pandas as pd
 from dateutil.relativedelta import relativedelta
 
+# Optional orjson for faster user-DB parsing
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Optional LangChain integration
 try:
     from langchain.prompts import PromptTemplate
@@ -22,8 +34,48 @@ try:
 except ImportError:
     LANGCHAIN_AVAILABLE = False
 
+# Optional Numba JIT for the numeric core of BNPL plan math
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+@functools.lru_cache(maxsize=2048)
+def _parse_date_fast(value: str) -> datetime:
+    """
+    Parse an ISO date string without dateutil's format inference.
+
+    The mock DB stores ISO YYYY-MM-DD dates, so fromisoformat's C fast
+    path handles everything; strptime covers any stragglers. Memoized so
+    repeated strings (the same user optimized many times per session)
+    cost a dict lookup.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d")
+
+
+def _bnpl_payments(amount: float, n: int) -> np.ndarray:
+    """
+    Split an amount into n equal installments, with the last payment
+    absorbing the rounding remainder. JIT-compiled when Numba is
+    installed; plain NumPy otherwise.
+    """
+    payments = np.empty(n, dtype=np.float64)
+    per = round(amount / n, 2)
+    payments[:n - 1] = per
+    payments[n - 1] = round(amount - per * (n - 1), 2)
+    return payments
+
 
-@dataclass
+if NUMBA_AVAILABLE:
+    _bnpl_payments = njit(cache=True)(_bnpl_payments)
+
+
+@dataclass(slots=True)
 class CartItem:
     """Represents an item in the shopping cart."""
     name: str
@@ -33,7 +85,7 @@ class CartItem:
     is_essential: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class PaymentPlan:
     """Represents a BNPL payment plan."""
     installments: int
@@ -42,18 +94,19 @@ class PaymentPlan:
     fee_percent: float = 0.0
 
 
-@dataclass
-class PaymentRecommendation:
+class PaymentRecommendation(NamedTuple):
     """Recommendation for a single item."""
     item: CartItem
     strategy: str  # "PAY_NOW" or "BNPL"
     reason: str
     payment_plan: Optional[PaymentPlan] = None
     installment_amount: float = 0.0
-    payment_dates: List[str] = field(default_factory=list)
+    # Shared empty-tuple sentinel: non-BNPL recommendations allocate no
+    # per-instance list
+    payment_dates: Tuple[str, ...] = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class CartOptimization:
     """Complete cart optimization result."""
     pay_now_items: List[CartItem]
@@ -65,6 +118,9 @@ class CartOptimization:
     summary: str
     warnings: List[str]
     projected_balance: float
+    # Resolves to the LLM-written summary when the LLM path is enabled;
+    # the synchronous `summary` above is always the rule-based text
+    summary_future: Optional[Future] = None
 
 
 class FinanceBrainAgent:
@@ -73,10 +129,11 @@ class FinanceBrainAgent:
     optimal payment splits using BNPL logic.
     """
     
-    # Categories considered essential (pay now)
-    ESSENTIAL_CATEGORIES = [
+    # Categories considered essential (pay now); frozenset gives O(1)
+    # membership tests in the classification loop
+    ESSENTIAL_CATEGORIES = frozenset({
         "Groceries", "Baby & Kids", "Health & Beauty", "Medicine"
-    ]
+    })
     
     # Minimum purchase amount for BNPL
     BNPL_MIN_AMOUNT = 35.0
@@ -94,6 +151,8 @@ class FinanceBrainAgent:
         """
         self.users = {}
         self.bnpl_config = {}
+        self._users_listing = []
+        self._executor = ThreadPoolExecutor(max_workers=2)
         self.use_llm = use_llm and LANGCHAIN_AVAILABLE
         self.llm_chain = None
         
@@ -114,13 +173,68 @@ class FinanceBrainAgent:
     
     def _load_user_db(self, path: str):
         """Load user database from JSON file."""
-        with open(path, 'r') as f:
-            data = json.load(f)
-            
-        for user in data.get("users", []):
+        if ORJSON_AVAILABLE:
+            with open(path, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(path, 'r') as f:
+                data = json.load(f)
+
+        users = data.get("users", [])
+
+        # Batch-parse every bill/paycheck date in one vectorized pass
+        # instead of one parser call per string
+        date_strings = []
+        for user in users:
+            date_strings.extend(b["due_date"] for b in user.get("upcoming_bills", []))
+            paycheck = user.get("next_paycheck")
+            if paycheck:
+                date_strings.append(paycheck["date"])
+
+        parsed = iter(
+            pd.to_datetime(date_strings, format="%Y-%m-%d", cache=True).to_pydatetime()
+            if date_strings else ()
+        )
+
+        for user in users:
+            # Distribute the preparsed datetimes back so the per-request
+            # hot path never touches a parser
+            for bill in user.get("upcoming_bills", []):
+                bill["_due_dt"] = next(parsed)
+
+            paycheck = user.get("next_paycheck")
+            if paycheck:
+                paycheck["_date_dt"] = next(parsed)
+
+            # Precompute everything about the user that is static for the
+            # session: sorted (due_dt, amount, name, due_str) bill tuples
+            # with a parallel key list for bisect, the spending buffer,
+            # and the paycheck schedule
+            bills_sorted = sorted(
+                (
+                    (bill["_due_dt"], bill["amount"], bill["name"], bill["due_date"])
+                    for bill in user.get("upcoming_bills", [])
+                ),
+                key=lambda b: b[0]
+            )
+            user["_static"] = {
+                "buffer": user["bank_balance"] * 0.10,
+                "bills_sorted": bills_sorted,
+                "bill_due_dts": [b[0] for b in bills_sorted],
+                "paycheck_dt": paycheck["_date_dt"] if paycheck else None,
+                "paycheck_amount": paycheck["amount"] if paycheck else 0,
+            }
+
             self.users[user["id"]] = user
-        
+
         self.bnpl_config = data.get("bnpl_config", {})
+
+        # Materialize the listing once; it only changes on reload
+        self._users_listing = [
+            {"id": u["id"], "name": u["name"], "balance": u["bank_balance"]}
+            for u in self.users.values()
+        ]
+
         print(f"  Loaded {len(self.users)} user profiles")
     
     def _init_llm(self):
@@ -165,68 +279,74 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
         return self.users.get(user_id)
     
     def list_users(self) -> List[Dict]:
-        """List all available user profiles."""
-        return [
-            {"id": u["id"], "name": u["name"], "balance": u["bank_balance"]}
-            for u in self.users.values()
-        ]
+        """List all available user profiles (materialized at load)."""
+        return self._users_listing
     
     def calculate_available_funds(
-        self, 
-        user_id: str, 
-        days_ahead: int = 30
+        self,
+        user_id: str,
+        days_ahead: int = 30,
+        now: Optional[datetime] = None
     ) -> Dict:
         """
         Calculate user's available funds after accounting for upcoming bills.
-        
+
         Args:
             user_id: User ID.
             days_ahead: Number of days to look ahead.
-            
+            now: Reference time; defaults to the current time. Callers in
+                the same request should pass one timestamp through so
+                repeated calls hit the per-day cache.
+
         Returns:
             Dictionary with financial analysis.
         """
+        if now is None:
+            now = datetime.now()
+        return self._compute_funds(user_id, now.date().isoformat(), days_ahead)
+
+    @functools.lru_cache(maxsize=256)
+    def _compute_funds(self, user_id: str, date_iso: str, days_ahead: int) -> Dict:
+        """Funds computation, memoized per (user, day, window)."""
         user = self.get_user(user_id)
         if not user:
             raise ValueError(f"User not found: {user_id}")
-        
-        today = datetime.now()
+
+        today = _parse_date_fast(date_iso)
         cutoff = today + timedelta(days=days_ahead)
-        
-        # Current balance
+
+        # Current balance and the session-static precomputed struct
         balance = user["bank_balance"]
-        
-        # Calculate upcoming bills within the period
+        static = user["_static"]
+
+        # Bisect the precomputed sorted index for bills in the period
         upcoming_bills = []
         total_bills = 0
-        
-        for bill in user.get("upcoming_bills", []):
-            due_date = parse_date(bill["due_date"])
-            if today <= due_date <= cutoff:
-                upcoming_bills.append({
-                    "name": bill["name"],
-                    "amount": bill["amount"],
-                    "due_date": bill["due_date"],
-                    "days_until": (due_date - today).days
-                })
-                total_bills += bill["amount"]
-        
+
+        lo = bisect.bisect_left(static["bill_due_dts"], today)
+        hi = bisect.bisect_right(static["bill_due_dts"], cutoff)
+
+        for due_date, amount, name, due_str in static["bills_sorted"][lo:hi]:
+            upcoming_bills.append({
+                "name": name,
+                "amount": amount,
+                "due_date": due_str,
+                "days_until": (due_date - today).days
+            })
+            total_bills += amount
+
         # Check for incoming paycheck
-        paycheck = user.get("next_paycheck", {})
         paycheck_amount = 0
-        paycheck_date = None
-        
-        if paycheck:
-            paycheck_date = parse_date(paycheck["date"])
-            if today <= paycheck_date <= cutoff:
-                paycheck_amount = paycheck["amount"]
-        
+        paycheck_date = static["paycheck_dt"]
+
+        if paycheck_date and today <= paycheck_date <= cutoff:
+            paycheck_amount = static["paycheck_amount"]
+
         # Calculate projected balance
         projected_balance = balance - total_bills + paycheck_amount
-        
-        # Available for discretionary spending (keep 10% buffer)
-        buffer = balance * 0.10
-        available_for_spending = max(0, balance - total_bills - buffer)
+
+        # Available for discretionary spending (10% buffer, precomputed)
+        available_for_spending = max(0, balance - total_bills - static["buffer"])
         
         # Safe BNPL installment amount (should fit within available funds)
         safe_installment = available_for_spending * 0.25  # Max 25% of available
@@ -273,35 +393,38 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
         return essential, discretionary
     
     def calculate_bnpl_plan(
-        self, 
-        amount: float, 
-        installments: int = 4
+        self,
+        amount: float,
+        installments: int = 4,
+        payment_dates: Optional[List[str]] = None
     ) -> Dict:
         """
         Calculate BNPL payment plan details.
-        
+
         Args:
             amount: Total amount to finance.
             installments: Number of payments.
-            
+            payment_dates: Precomputed payment-date strings; generated
+                from today when not supplied.
+
         Returns:
             Payment plan details.
         """
-        today = datetime.now()
-        
-        # Standard 4-pay plan: every 2 weeks
-        installment_amount = round(amount / installments, 2)
-        
-        # Adjust for rounding (last payment covers remainder)
-        payments = [installment_amount] * (installments - 1)
-        payments.append(round(amount - sum(payments), 2))
-        
+        # Standard 4-pay plan: every 2 weeks; last payment covers the
+        # rounding remainder
+        payments_arr = _bnpl_payments(amount, installments)
+        installment_amount = float(payments_arr[0])
+        payments = [float(p) for p in payments_arr]
+
         # Payment dates (every 2 weeks)
-        dates = []
-        for i in range(installments):
-            payment_date = today + timedelta(weeks=2 * i)
-            dates.append(payment_date.strftime("%Y-%m-%d"))
-        
+        if payment_dates is None:
+            today = datetime.now()
+            payment_dates = [
+                (today + timedelta(weeks=2 * i)).date().isoformat()
+                for i in range(installments)
+            ]
+        dates = payment_dates
+
         return {
             "total_amount": amount,
             "installments": installments,
@@ -327,8 +450,12 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
         Returns:
             CartOptimization with recommendations.
         """
+        # One timestamp per request, threaded through the funds cache
+        # and the BNPL date strings
+        now = datetime.now()
+
         # Get user's financial situation
-        finances = self.calculate_available_funds(user_id)
+        finances = self.calculate_available_funds(user_id, now=now)
         user = self.get_user(user_id)
         
         if not user:
@@ -336,20 +463,39 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
         
         # Classify items
         essential, discretionary = self.classify_items(items)
-        
-        # Calculate totals
-        essential_total = sum(item.price for item in essential)
-        discretionary_total = sum(item.price for item in discretionary)
+
+        # Calculate totals from contiguous price vectors (one C-level
+        # reduce per group instead of Python generator passes); the
+        # discretionary vector is reused for per-item installment math
+        essential_prices = np.fromiter(
+            (item.price for item in essential), dtype=np.float64, count=len(essential)
+        )
+        discretionary_prices = np.fromiter(
+            (item.price for item in discretionary), dtype=np.float64, count=len(discretionary)
+        )
+        essential_total = float(essential_prices.sum())
+        discretionary_total = float(discretionary_prices.sum())
         cart_total = essential_total + discretionary_total
         
         # Determine what can be paid now
         available = finances["available_for_spending"]
         safe_installment = finances["safe_bnpl_installment"]
+
+        # Biweekly BNPL dates are identical for every item in this cart;
+        # build the strings once instead of per calculate_bnpl_plan call
+        bnpl_dates = [
+            (now + timedelta(weeks=2 * i)).date().isoformat() for i in range(4)
+        ]
         
         recommendations = []
         warnings = []
         pay_now_items = []
         bnpl_items = []
+
+        # Totals accumulate inside the recommendation loop so the item
+        # lists are traversed exactly once
+        pay_now_total = 0.0
+        bnpl_total = 0.0
         
         # Essential items should always be paid now
         for item in essential:
@@ -360,10 +506,31 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
             )
             recommendations.append(rec)
             pay_now_items.append(item)
-        
-        # Analyze discretionary items for BNPL
-        for item in discretionary:
-            if not finances["bnpl_eligible"]:
+            pay_now_total += item.price
+        
+        # Analyze discretionary items for BNPL. The rule conditions are
+        # evaluated in one vectorized pass over the price vector; the loop
+        # below only constructs recommendations from the strategy codes.
+        n_disc = len(discretionary)
+        if not finances["bnpl_eligible"]:
+            # Account-level ineligibility overrides every other rule
+            codes = np.zeros(n_disc, dtype=np.intp)
+        else:
+            # Affordability compares the raw price/4 quotient, matching
+            # the unrounded comparison the ladder always made
+            codes = np.select(
+                [
+                    discretionary_prices > self.BNPL_MAX_AMOUNT,
+                    np.full(n_disc, essential_total > available),
+                    essential_total + discretionary_prices > available,
+                    discretionary_prices * 0.25 <= safe_installment,
+                ],
+                [1, 2, 3, 4],
+                default=5,
+            )
+
+        for item, code in zip(discretionary, codes):
+            if code == 0:
                 # User not eligible for BNPL
                 rec = PaymentRecommendation(
                     item=item,
@@ -371,7 +538,8 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
                     reason="BNPL not available for your account."
                 )
                 pay_now_items.append(item)
-            elif item.price > self.BNPL_MAX_AMOUNT:
+                pay_now_total += item.price
+            elif code == 1:
                 # Item exceeds BNPL limit
                 rec = PaymentRecommendation(
                     item=item,
@@ -379,10 +547,11 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
                     reason=f"Item exceeds BNPL limit of ${self.BNPL_MAX_AMOUNT}."
                 )
                 pay_now_items.append(item)
+                pay_now_total += item.price
                 warnings.append(f"{item.name} exceeds BNPL maximum amount.")
-            elif essential_total > available:
+            elif code == 2:
                 # Can't afford essentials, definitely use BNPL
-                plan = self.calculate_bnpl_plan(item.price)
+                plan = self.calculate_bnpl_plan(item.price, payment_dates=bnpl_dates)
                 rec = PaymentRecommendation(
                     item=item,
                     strategy="BNPL",
@@ -393,10 +562,11 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
                     payment_dates=plan["payment_dates"]
                 )
                 bnpl_items.append(item)
+                bnpl_total += item.price
                 warnings.append("Budget is tight! Consider if all items are necessary.")
-            elif essential_total + item.price > available:
+            elif code == 3:
                 # This item would exceed budget
-                plan = self.calculate_bnpl_plan(item.price)
+                plan = self.calculate_bnpl_plan(item.price, payment_dates=bnpl_dates)
                 rec = PaymentRecommendation(
                     item=item,
                     strategy="BNPL",
@@ -408,20 +578,24 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
                     payment_dates=plan["payment_dates"]
                 )
                 bnpl_items.append(item)
-            elif plan_installment := (item.price / 4) <= safe_installment:
-                # BNPL installment is affordable
-                plan = self.calculate_bnpl_plan(item.price)
+                bnpl_total += item.price
+            elif code == 4:
+                # BNPL installment is affordable; build the plan inline
+                # from the precomputed dates. Same banker's rounding as
+                # calculate_bnpl_plan so recorded amounts agree
+                installment = round(item.price / 4, 2)
                 rec = PaymentRecommendation(
                     item=item,
                     strategy="BNPL",
-                    reason=f"At ${plan['installment_amount']:.2f} per payment, "
+                    reason=f"At ${installment:.2f} per payment, "
                            f"this fits comfortably in your budget while preserving "
                            f"cash for unexpected expenses.",
                     payment_plan=PaymentPlan(installments=4),
-                    installment_amount=plan["installment_amount"],
-                    payment_dates=plan["payment_dates"]
+                    installment_amount=installment,
+                    payment_dates=bnpl_dates
                 )
                 bnpl_items.append(item)
+                bnpl_total += item.price
             else:
                 # User can afford to pay now
                 rec = PaymentRecommendation(
@@ -430,12 +604,11 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
                     reason="You have sufficient funds. Paying now avoids future obligations."
                 )
                 pay_now_items.append(item)
+                pay_now_total += item.price
             
             recommendations.append(rec)
         
-        # Calculate final totals
-        pay_now_total = sum(item.price for item in pay_now_items)
-        bnpl_total = sum(item.price for item in bnpl_items)
+        # Totals were accumulated in the loops above
         monthly_bnpl = bnpl_total / 4 if bnpl_items else 0
         
         # Check if the first payment is affordable
@@ -451,12 +624,17 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
                 f"⚠ Caution: This would leave only ${projected:.2f} in your account."
             )
         
-        # Generate summary
+        # Generate summary: rule-based text immediately, LLM (if enabled)
+        # off the critical path on the executor
         summary = self._generate_summary(
-            user, finances, pay_now_items, bnpl_items, 
+            user, finances, pay_now_items, bnpl_items,
             pay_now_total, bnpl_total, projected
         )
-        
+        summary_future = self._submit_llm_summary(
+            user, finances, pay_now_items, bnpl_items,
+            pay_now_total, bnpl_total
+        )
+
         return CartOptimization(
             pay_now_items=pay_now_items,
             bnpl_items=bnpl_items,
@@ -466,7 +644,8 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
             recommendations=recommendations,
             summary=summary,
             warnings=warnings,
-            projected_balance=round(projected, 2)
+            projected_balance=round(projected, 2),
+            summary_future=summary_future
         )
     
     def _generate_summary(
@@ -479,67 +658,88 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
         bnpl_total: float,
         projected_balance: float
     ) -> str:
-        """Generate a natural language summary of the recommendation."""
-        
-        # Try LLM if available
-        if self.use_llm and self.llm_chain:
-            try:
-                context = f"""
-                Name: {user['name']}
-                Current Balance: ${finances['current_balance']:.2f}
-                Upcoming Bills: ${finances['total_bills']:.2f}
-                Next Paycheck: ${finances['paycheck_expected']:.2f} on {finances['paycheck_date']}
-                """
-                
-                items_str = "\n".join([
-                    f"- {item.name} (${item.price:.2f}, {item.category})"
-                    for item in pay_now_items + bnpl_items
-                ])
-                
-                rec_str = f"""
-                Pay Now: {len(pay_now_items)} items totaling ${pay_now_total:.2f}
-                BNPL: {len(bnpl_items)} items totaling ${bnpl_total:.2f}
-                (4 payments of ${bnpl_total/4:.2f} every 2 weeks)
-                """
-                
-                result = self.llm_chain.run(
-                    context=context,
-                    items=items_str,
-                    recommendation=rec_str
-                )
-                return result.strip()
-            except Exception as e:
-                print(f"LLM generation failed: {e}")
-        
+        """Generate the rule-based natural language summary."""
         # Rule-based summary
         if not bnpl_items:
             return (
                 f"✅ Great news! You can comfortably pay ${pay_now_total:.2f} for all items today.\n"
                 f"Your projected balance after this purchase: ${projected_balance:.2f}"
             )
-        
-        summary_parts = [
-            f"💡 **Smart Payment Strategy for {user['name']}**\n",
-            f"**Today's Payment:** ${pay_now_total:.2f} for essentials "
-            f"({len(pay_now_items)} items)\n",
-            f"**BNPL Items:** ${bnpl_total:.2f} split into 4 payments of "
-            f"${bnpl_total/4:.2f} every 2 weeks\n",
-        ]
-        
-        # Add specific item callouts
-        if bnpl_items:
-            bnpl_names = ", ".join(item.name for item in bnpl_items[:3])
-            summary_parts.append(f"\n📦 **Financing:** {bnpl_names}\n")
-        
-        # Add financial reasoning
+
+        # Compute shared pieces once, then emit one f-string
+        installment = bnpl_total * 0.25
+        bnpl_names = ", ".join(item.name for item in bnpl_items[:3])
+
+        paycheck_note = ""
         if finances["paycheck_expected"] > 0:
-            summary_parts.append(
+            paycheck_note = (
                 f"\n💰 With your next paycheck of ${finances['paycheck_expected']:.2f} "
                 f"coming on {finances['paycheck_date']}, this strategy ensures you "
                 f"have enough for rent and bills while getting everything you need today."
             )
-        
-        return "".join(summary_parts)
+
+        return (
+            f"💡 **Smart Payment Strategy for {user['name']}**\n"
+            f"**Today's Payment:** ${pay_now_total:.2f} for essentials "
+            f"({len(pay_now_items)} items)\n"
+            f"**BNPL Items:** ${bnpl_total:.2f} split into 4 payments of "
+            f"${installment:.2f} every 2 weeks\n"
+            f"\n📦 **Financing:** {bnpl_names}\n"
+            f"{paycheck_note}"
+        )
+
+    def _submit_llm_summary(
+        self,
+        user: Dict,
+        finances: Dict,
+        pay_now_items: List[CartItem],
+        bnpl_items: List[CartItem],
+        pay_now_total: float,
+        bnpl_total: float
+    ) -> Optional[Future]:
+        """
+        Kick the LLM explanation off on the background executor so
+        optimize_cart never blocks on the network round-trip.
+
+        Returns:
+            Future resolving to the LLM summary text (None on failure),
+            or None when the LLM path is disabled.
+        """
+        if not (self.use_llm and self.llm_chain):
+            return None
+
+        context = f"""
+        Name: {user['name']}
+        Current Balance: ${finances['current_balance']:.2f}
+        Upcoming Bills: ${finances['total_bills']:.2f}
+        Next Paycheck: ${finances['paycheck_expected']:.2f} on {finances['paycheck_date']}
+        """
+
+        items_str = "\n".join([
+            f"- {item.name} (${item.price:.2f}, {item.category})"
+            for item in pay_now_items + bnpl_items
+        ])
+
+        installment = bnpl_total / 4
+        rec_str = f"""
+        Pay Now: {len(pay_now_items)} items totaling ${pay_now_total:.2f}
+        BNPL: {len(bnpl_items)} items totaling ${bnpl_total:.2f}
+        (4 payments of ${installment:.2f} every 2 weeks)
+        """
+
+        def _run():
+            try:
+                result = self.llm_chain.run(
+                    context=context,
+                    items=items_str,
+                    recommendation=rec_str
+                )
+                return result.strip()
+            except Exception as e:
+                print(f"LLM generation failed: {e}")
+                return None
+
+        return self._executor.submit(_run)
     
     def get_payment_calendar(
         self, 
@@ -557,54 +757,63 @@ Provide a brief, friendly explanation (2-3 sentences) of why this payment strate
             List of calendar events.
         """
         user = self.get_user(user_id)
-        finances = self.calculate_available_funds(user_id)
-        
-        events = []
-        
+        now = datetime.now()
+        finances = self.calculate_available_funds(user_id, now=now)
+
+        # Each group below is already in date order (ISO strings sort
+        # lexically; bills come pre-sorted from the load-time index), so
+        # an O(n) heapq.merge replaces the final O(n log n) sort.
+
         # Today: immediate payment
-        events.append({
-            "date": datetime.now().strftime("%Y-%m-%d"),
+        today_events = [{
+            "date": now.date().isoformat(),
             "type": "PAYMENT",
             "description": "Cart Purchase - Pay Now Items",
             "amount": -optimization.pay_now_total,
             "balance_after": finances["current_balance"] - optimization.pay_now_total
-        })
-        
-        # BNPL payments
+        }]
+
+        # BNPL payments; the per-installment amount is already stored on
+        # the optimization, so don't re-derive it per event
+        bnpl_events = []
         if optimization.bnpl_items:
+            per = optimization.monthly_bnpl_payment
+            bnpl_names = [item.name for item in optimization.bnpl_items]
             for i in range(4):
-                payment_date = datetime.now() + timedelta(weeks=2 * i)
-                amount = optimization.bnpl_total / 4
-                events.append({
-                    "date": payment_date.strftime("%Y-%m-%d"),
+                payment_date = now + timedelta(weeks=2 * i)
+                bnpl_events.append({
+                    "date": payment_date.date().isoformat(),
                     "type": "BNPL_PAYMENT",
                     "description": f"BNPL Payment {i+1}/4",
-                    "amount": -amount,
-                    "items": [item.name for item in optimization.bnpl_items]
+                    "amount": -per,
+                    "items": bnpl_names
                 })
-        
-        # Add upcoming bills
-        for bill in finances["upcoming_bills"]:
-            events.append({
+
+        # Upcoming bills
+        bill_events = [
+            {
                 "date": bill["due_date"],
                 "type": "BILL",
                 "description": bill["name"],
                 "amount": -bill["amount"]
-            })
-        
-        # Add paycheck
+            }
+            for bill in finances["upcoming_bills"]
+        ]
+
+        # Paycheck
+        paycheck_events = []
         if finances["paycheck_date"]:
-            events.append({
+            paycheck_events.append({
                 "date": finances["paycheck_date"],
                 "type": "INCOME",
                 "description": "Paycheck",
                 "amount": finances["paycheck_expected"]
             })
-        
-        # Sort by date
-        events.sort(key=lambda x: x["date"])
-        
-        return events
+
+        return list(heapq.merge(
+            today_events, bnpl_events, bill_events, paycheck_events,
+            key=lambda e: e["date"]
+        ))
 
 
 # Helper function to create CartItem from various sources
@@ -4,13 +4,13 @@ Uses YOLOv8 for shopping cart item detection and classification.
 """
 
 import os
-from typing import List, Dict, Optional, Tuple
+from typing import BinaryIO, List, Dict, Optional, Tuple, Union
 from dataclasses import dataclass
 from pathlib import Path
 
+import cv2
 import torch
 import numpy as np
-from PIL import Image
 
 # Conditional import for ultralytics
 try:
@@ -31,6 +31,39 @@ class DetectedItem:
     estimated_price: Optional[float] = None
 
 
+class DetectedItemsBatch:
+    """
+    Struct-of-arrays container for detection results.
+
+    Names, categories, confidences, bounding boxes and prices live in
+    parallel arrays so reductions (totals, per-category sums) run as
+    contiguous C loops; iteration yields DetectedItem views so existing
+    callers keep working unchanged.
+    """
+
+    __slots__ = ("names", "categories", "confidences", "bboxes", "prices")
+
+    def __init__(self, names, categories, confidences, bboxes, prices):
+        self.names = np.asarray(names, dtype=object)
+        self.categories = np.asarray(categories, dtype=object)
+        self.confidences = np.asarray(confidences, dtype=np.float32)
+        self.bboxes = np.asarray(bboxes, dtype=np.int32).reshape(-1, 4)
+        self.prices = np.asarray(prices, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self):
+        for i in range(len(self.names)):
+            yield DetectedItem(
+                name=self.names[i],
+                category=self.categories[i],
+                confidence=float(self.confidences[i]),
+                bounding_box=tuple(int(v) for v in self.bboxes[i]),
+                estimated_price=float(self.prices[i]),
+            )
+
+
 # Mapping from COCO classes to Walmart categories
 COCO_TO_WALMART_MAPPING = {
     # Electronics
@@ -136,6 +169,30 @@ ESTIMATED_PRICES = {
     "Book": 14.99,
 }
 
+# Annotation colors per category
+CATEGORY_COLORS = {
+    "Electronics": "#FF6B6B",
+    "Groceries": "#4ECDC4",
+    "Household": "#45B7D1",
+    "Health & Beauty": "#96CEB4",
+    "Sports": "#FFEAA7",
+    "Baby & Kids": "#DDA0DD",
+    "Clothing": "#98D8C8",
+    "Books & Media": "#F7DC6F",
+    "General": "#BDC3C7",
+}
+
+
+def _hex_to_bgr(color: str) -> Tuple[int, int, int]:
+    """Convert '#RRGGBB' to OpenCV's BGR tuple."""
+    value = int(color.lstrip('#'), 16)
+    return (value & 0xFF, (value >> 8) & 0xFF, (value >> 16) & 0xFF)
+
+
+# Precomputed BGR tuples so the draw loop skips hex parsing
+_CATEGORY_COLORS_BGR = {cat: _hex_to_bgr(c) for cat, c in CATEGORY_COLORS.items()}
+_DEFAULT_BGR = _hex_to_bgr("#BDC3C7")
+
 
 class CartVisionEngine:
     """
@@ -154,7 +211,9 @@ class CartVisionEngine:
         self.confidence_threshold = confidence_threshold
         self.model = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        
+        self._half = False
+        self._cls_lut = {}
+
         if YOLO_AVAILABLE:
             try:
                 if model_path and os.path.exists(model_path):
@@ -163,79 +222,138 @@ class CartVisionEngine:
                     # Use pre-trained YOLOv8 nano (fastest, good for demo)
                     self.model = YOLO("yolov8n.pt")
                 self.model.to(self.device)
-                print(f"✓ YOLO model loaded on {self.device}")
+
+                # FP16 halves activation memory and roughly doubles
+                # tensor-core throughput on CUDA; CPU stays FP32
+                if self.device == "cuda":
+                    try:
+                        self.model.model.half()
+                        self._half = True
+                    except Exception as e:
+                        print(f"Warning: FP16 unavailable, staying FP32: {e}")
+
+                # Resolve COCO class ids to (item, category, price) once;
+                # the detection loop then skips the per-box lower() and
+                # mapping/price dict hops
+                for cid, name in self.model.names.items():
+                    key = name.lower()
+                    if key in COCO_TO_WALMART_MAPPING:
+                        item_name, category = COCO_TO_WALMART_MAPPING[key]
+                    else:
+                        item_name, category = name.title(), "General"
+                    self._cls_lut[cid] = (
+                        item_name, category, ESTIMATED_PRICES.get(item_name, 9.99)
+                    )
+
+                print(f"✓ YOLO model loaded on {self.device}"
+                      f"{' (FP16)' if self._half else ''}")
             except Exception as e:
                 print(f"Warning: Could not load YOLO model: {e}")
                 self.model = None
         else:
             print("⚠ Running in mock mode (ultralytics not installed)")
     
-    def detect_items(self, image_path: str) -> List[DetectedItem]:
+    def detect_items(self, image_source: Union[str, BinaryIO]) -> Union[List[DetectedItem], DetectedItemsBatch]:
         """
         Detect items in a shopping cart image.
-        
+
         Args:
-            image_path: Path to the cart image.
-            
+            image_source: Path to the cart image, or a binary file-like
+                object holding the encoded image (avoids a disk round-trip).
+
         Returns:
-            List of DetectedItem objects.
+            Detected items: a DetectedItemsBatch on the YOLO path (its
+            iteration yields DetectedItem views), or a plain list from
+            mock detection.
         """
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image not found: {image_path}")
-        
+        if isinstance(image_source, str) and not os.path.exists(image_source):
+            raise FileNotFoundError(f"Image not found: {image_source}")
+
         if self.model is None:
-            return self._mock_detection(image_path)
-        
-        return self._yolo_detection(image_path)
-    
-    def _yolo_detection(self, image_path: str) -> List[DetectedItem]:
-        """Run actual YOLO detection."""
-        results = self.model(image_path, verbose=False)
-        detected_items = []
-        
+            return self._mock_detection(image_source)
+
+        return self._yolo_detection(image_source)
+
+    # Model input size; inference cost scales ~quadratically with this
+    YOLO_INPUT_SIZE = 640
+
+    def _load_for_yolo(self, image_source: Union[str, BinaryIO]) -> Tuple[np.ndarray, float]:
+        """
+        Decode an image and downscale its long edge to the model input
+        size, returning (array, scale). Pre-sizing here keeps ultralytics
+        from letterboxing a full-resolution photo internally; callers
+        scale detected boxes back by 1/scale.
+        """
+        if isinstance(image_source, str):
+            img = cv2.imread(image_source)
+        else:
+            image_source.seek(0)
+            data = np.frombuffer(image_source.read(), dtype=np.uint8)
+            img = cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+        if img is None:
+            raise FileNotFoundError(f"Cannot read image: {image_source}")
+
+        h, w = img.shape[:2]
+        scale = self.YOLO_INPUT_SIZE / max(h, w)
+        if scale < 1.0:
+            img = cv2.resize(img, (int(w * scale), int(h * scale)))
+        else:
+            scale = 1.0
+        return img, scale
+
+    def _yolo_detection(self, image_source: Union[str, BinaryIO]) -> DetectedItemsBatch:
+        """Run actual YOLO detection into a struct-of-arrays batch."""
+        arr, scale = self._load_for_yolo(image_source)
+        inv_scale = 1.0 / scale
+        results = self.model(arr, verbose=False,
+                             imgsz=self.YOLO_INPUT_SIZE, half=self._half)
+
+        names, categories, prices = [], [], []
+        conf_chunks, bbox_chunks = [], []
+
         for result in results:
             boxes = result.boxes
             if boxes is None:
                 continue
-                
-            for i in range(len(boxes)):
-                confidence = float(boxes.conf[i])
-                if confidence < self.confidence_threshold:
-                    continue
-                
-                class_id = int(boxes.cls[i])
-                class_name = self.model.names[class_id].lower()
-                
-                # Map COCO class to Walmart item
-                if class_name in COCO_TO_WALMART_MAPPING:
-                    item_name, category = COCO_TO_WALMART_MAPPING[class_name]
-                else:
-                    item_name = class_name.title()
-                    category = "General"
-                
-                # Get bounding box
-                bbox = boxes.xyxy[i].cpu().numpy()
-                x1, y1, x2, y2 = map(int, bbox)
-                
-                # Estimate price
-                price = ESTIMATED_PRICES.get(item_name, 9.99)
-                
-                detected_items.append(DetectedItem(
-                    name=item_name,
-                    category=category,
-                    confidence=confidence,
-                    bounding_box=(x1, y1, x2, y2),
-                    estimated_price=price
-                ))
-        
-        return detected_items
+
+            # Three bulk device->host transfers instead of one per box,
+            # with the confidence filter applied vectorized
+            confs = boxes.conf.cpu().numpy()
+            keep = confs >= self.confidence_threshold
+            confs = confs[keep]
+            cls_ids = boxes.cls.cpu().numpy().astype(np.int32)[keep]
+            # Boxes come back in resized coordinates; map to the original
+            xyxy = (boxes.xyxy.cpu().numpy()[keep] * inv_scale).astype(np.int32)
+
+            for cid in cls_ids:
+                # Prebuilt class-id LUT: item name, category and price
+                # in one dict hop
+                item_name, category, price = self._cls_lut[int(cid)]
+                names.append(item_name)
+                categories.append(category)
+                prices.append(price)
+
+            conf_chunks.append(confs)
+            bbox_chunks.append(xyxy)
+
+        return DetectedItemsBatch(
+            names,
+            categories,
+            np.concatenate(conf_chunks) if conf_chunks else np.empty(0, dtype=np.float32),
+            np.concatenate(bbox_chunks) if bbox_chunks else np.empty((0, 4), dtype=np.int32),
+            prices,
+        )
     
-    def _mock_detection(self, image_path: str) -> List[DetectedItem]:
+    def _mock_detection(self, image_source: Union[str, BinaryIO]) -> List[DetectedItem]:
         """
         Mock detection for testing when YOLO is not available.
         Returns sample items based on image filename hints.
         """
-        filename = os.path.basename(image_path).lower()
+        if isinstance(image_source, str):
+            filename = os.path.basename(image_source).lower()
+        else:
+            filename = os.path.basename(getattr(image_source, "name", "")).lower()
         
         # Default mock items
         mock_items = [
@@ -299,57 +417,47 @@ class CartVisionEngine:
         
         return mock_items
     
-    def annotate_image(self, image_path: str, items: List[DetectedItem]) -> Image.Image:
+    def annotate_image(self, image_source: Union[str, np.ndarray], items: List[DetectedItem]) -> np.ndarray:
         """
         Draw bounding boxes and labels on the image.
-        
+
         Args:
-            image_path: Path to the original image.
+            image_source: Path to the original image, or a decoded BGR
+                array (a copy is annotated either way).
             items: List of detected items.
-            
+
         Returns:
-            Annotated PIL Image.
+            Annotated image as a BGR numpy array; callers that need PIL
+            can wrap at the boundary with Image.fromarray(arr[..., ::-1]).
         """
-        from PIL import ImageDraw, ImageFont
-        
-        img = Image.open(image_path).convert("RGB")
-        draw = ImageDraw.Draw(img)
-        
-        # Try to use a nice font, fallback to default
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 14)
-        except:
-            font = ImageFont.load_default()
-        
-        # Color mapping for categories
-        category_colors = {
-            "Electronics": "#FF6B6B",
-            "Groceries": "#4ECDC4",
-            "Household": "#45B7D1",
-            "Health & Beauty": "#96CEB4",
-            "Sports": "#FFEAA7",
-            "Baby & Kids": "#DDA0DD",
-            "Clothing": "#98D8C8",
-            "Books & Media": "#F7DC6F",
-            "General": "#BDC3C7",
-        }
-        
+        # OpenCV end to end: no cv2<->PIL conversion and each item costs
+        # three C-level draw calls
+        if isinstance(image_source, str):
+            arr = cv2.imread(image_source)
+            if arr is None:
+                raise FileNotFoundError(f"Cannot read image: {image_source}")
+        else:
+            arr = image_source.copy()
+
         for item in items:
             x1, y1, x2, y2 = item.bounding_box
-            color = category_colors.get(item.category, "#BDC3C7")
-            
-            # Draw bounding box
-            draw.rectangle([x1, y1, x2, y2], outline=color, width=3)
-            
-            # Draw label background
+            color = _CATEGORY_COLORS_BGR.get(item.category, _DEFAULT_BGR)
             label = f"{item.name} (${item.estimated_price:.2f})"
-            bbox = draw.textbbox((x1, y1 - 20), label, font=font)
-            draw.rectangle([bbox[0] - 2, bbox[1] - 2, bbox[2] + 2, bbox[3] + 2], fill=color)
-            
-            # Draw label text
-            draw.text((x1, y1 - 20), label, fill="white", font=font)
-        
-        return img
+
+            # Draw bounding box
+            cv2.rectangle(arr, (x1, y1), (x2, y2), color, 3)
+
+            # Draw label background, then the label text
+            (tw, th), baseline = cv2.getTextSize(
+                label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1
+            )
+            cv2.rectangle(arr, (x1 - 2, y1 - th - baseline - 6),
+                          (x1 + tw + 2, y1 - 2), color, -1)
+            cv2.putText(arr, label, (x1, y1 - baseline - 4),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1,
+                        cv2.LINE_AA)
+
+        return arr
     
     def get_cart_summary(self, items: List[DetectedItem]) -> Dict:
         """
@@ -361,15 +469,30 @@ class CartVisionEngine:
         Returns:
             Dictionary with cart summary.
         """
-        total = sum(item.estimated_price or 0 for item in items)
-        
+        # One contiguous price vector: the grand total and per-category
+        # subtotals reduce in C (unique + bincount) instead of Python.
+        # Batches already store prices as an array
+        if isinstance(items, DetectedItemsBatch):
+            prices = items.prices.astype(np.float64)
+        else:
+            prices = np.fromiter(
+                (item.estimated_price or 0.0 for item in items),
+                dtype=np.float64, count=len(items)
+            )
+        total = float(prices.sum())
+
         # Group by category
         categories = {}
-        for item in items:
-            if item.category not in categories:
-                categories[item.category] = {"items": [], "subtotal": 0}
-            categories[item.category]["items"].append(item.name)
-            categories[item.category]["subtotal"] += item.estimated_price or 0
+        if items:
+            cats = np.array([item.category for item in items], dtype=object)
+            uniq, inv = np.unique(cats, return_inverse=True)
+            subtotals = np.bincount(inv, weights=prices)
+            categories = {
+                cat: {"items": [], "subtotal": float(sub)}
+                for cat, sub in zip(uniq, subtotals)
+            }
+            for item in items:
+                categories[item.category]["items"].append(item.name)
         
         return {
             "total_items": len(items),
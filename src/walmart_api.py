@@ -3,12 +3,25 @@ Walmart Mock API Module
 Simulates Walmart's product database for price lookups and category info.
 """
 
-from typing import List, Dict, Optional, Tuple
+import functools
+import math
+import re
+from typing import List, Dict, Optional, Set, Tuple
 from dataclasses import dataclass
-from fuzzywuzzy import fuzz, process
 
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process, utils
+from rapidfuzz.distance import Levenshtein
 
-@dataclass
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+@dataclass(slots=True, frozen=True)
 class Product:
     """Represents a Walmart product."""
     id: str
@@ -20,8 +33,9 @@ class Product:
     brand: Optional[str] = None
 
 
-# Mock product catalog
-PRODUCT_CATALOG = [
+# Mock product catalog (immutable; tuple avoids list overallocation and
+# lets iteration specialize)
+PRODUCT_CATALOG = (
     # Electronics
     Product("EL001", "Apple AirPods Pro", "Electronics", 249.99, True, "Electronics", "Apple"),
     Product("EL002", "Samsung Galaxy Buds", "Electronics", 149.99, True, "Electronics", "Samsung"),
@@ -101,12 +115,244 @@ PRODUCT_CATALOG = [
     Product("FN002", "Bookshelf", "Furniture", 79.99, True, "Living Room", "Better Homes"),
     Product("FN003", "TV Stand", "Furniture", 129.99, True, "Living Room", "Mainstays"),
     Product("FN004", "Bed Frame Queen", "Furniture", 249.99, True, "Bedroom", "Zinus"),
-]
+)
 
 # Create lookup dictionaries for fast access
 PRODUCT_BY_ID = {p.id: p for p in PRODUCT_CATALOG}
+PRODUCT_BY_NAME = {p.name: p for p in PRODUCT_CATALOG}
 PRODUCT_NAMES = [p.name for p in PRODUCT_CATALOG]
 
+# Normalized once at import so the fuzzy matcher never re-normalizes
+# the catalog side of a comparison; indices line up with PRODUCT_CATALOG
+PRODUCT_NAMES_NORMALIZED = [utils.default_process(n) for n in PRODUCT_NAMES]
+
+# Struct-of-arrays view of the catalog: category/BNPL filters and
+# aggregations run as vectorized masks over contiguous columns instead
+# of chasing 70 heap objects. Rows line up with PRODUCT_CATALOG
+CATALOG_DF = pd.DataFrame({
+    "id": [p.id for p in PRODUCT_CATALOG],
+    "name": PRODUCT_NAMES,
+    "category": [p.category for p in PRODUCT_CATALOG],
+    "price": np.asarray([p.price for p in PRODUCT_CATALOG], dtype=np.float32),
+    "bnpl": np.asarray([p.bnpl_eligible for p in PRODUCT_CATALOG], dtype=bool),
+})
+
+# Products grouped by lowercased category, so category lookups are one
+# dict hop with no per-call .lower() over the catalog
+CATEGORY_INDEX: Dict[str, List[Product]] = {}
+for _product in PRODUCT_CATALOG:
+    CATEGORY_INDEX.setdefault(_product.category.lower(), []).append(_product)
+
+
+def _build_keyword_matcher(table: Tuple[Tuple[str, object], ...]):
+    """
+    Build a substring matcher over (keyword, value) pairs in priority
+    order, returning the value of the highest-priority keyword found.
+
+    Uses a pyahocorasick automaton when the package is installed (one
+    pass per string instead of one `in` scan per keyword); otherwise a
+    single alternation regex.
+    """
+    priorities = {kw: (rank, value) for rank, (kw, value) in enumerate(table)}
+
+    if AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for kw, ranked in priorities.items():
+            automaton.add_word(kw, ranked)
+        automaton.make_automaton()
+
+        def match(text: str):
+            best = None
+            for _, ranked in automaton.iter(text):
+                if best is None or ranked[0] < best[0]:
+                    best = ranked
+            return best[1] if best else None
+
+        return match
+
+    pattern = re.compile("|".join(re.escape(kw) for kw in priorities))
+
+    def match(text: str):
+        best = None
+        for m in pattern.finditer(text):
+            ranked = priorities[m.group(0)]
+            if best is None or ranked[0] < best[0]:
+                best = ranked
+        return best[1] if best else None
+
+    return match
+
+
+# Price bands for items missing from the catalog, compiled into one
+# pattern: a single linear scan resolves the band via the named group
+# of the first keyword found in the name
+_PRICE_BAND_RE = re.compile(
+    r'(?P<elec>tv|laptop|phone|tablet|console)'
+    r'|(?P<acc>cable|charger|adapter)'
+    r'|(?P<baby>diaper|formula|wipes)'
+    r'|(?P<dairy>milk|bread|eggs|cheese)'
+    r'|(?P<meat>meat|chicken|beef|fish)'
+)
+_PRICE_BAND_MAP = {
+    "elec": 299.99,
+    "acc": 14.99,
+    "baby": 24.99,
+    "dairy": 4.99,
+    "meat": 8.99,
+}
+
+# Category keywords for items missing from the catalog, in the priority
+# order the old if/elif ladder checked them
+_GUESS_CATEGORY_TABLE = tuple(
+    (kw, cat)
+    for cat, kws in (
+        ("Electronics", ("tv", "laptop", "phone", "cable", "charger", "speaker", "headphone")),
+        ("Groceries", ("milk", "bread", "eggs", "cheese", "fruit", "vegetable", "meat", "chicken")),
+        ("Baby & Kids", ("diaper", "baby", "wipes", "formula", "toy", "lego")),
+        ("Health & Beauty", ("toothpaste", "shampoo", "soap", "vitamin", "medicine")),
+        ("Household", ("paper", "towel", "cleaner", "detergent", "bag")),
+        ("Clothing", ("shirt", "pants", "shoes", "jacket", "dress")),
+        ("Sports", ("ball", "yoga", "weight", "tent", "fishing")),
+    )
+    for kw in kws
+)
+_GUESS_CATEGORY_MATCH = _build_keyword_matcher(_GUESS_CATEGORY_TABLE)
+
+
+@functools.cache
+def _get_trigram_index() -> Dict[str, Set[int]]:
+    """
+    Map each character trigram to the catalog indices containing it.
+    Built on the first fuzzy search so ID-only callers pay no import
+    cost for it.
+    """
+    index: Dict[str, Set[int]] = {}
+    for i, name in enumerate(PRODUCT_NAMES_NORMALIZED):
+        for j in range(len(name) - 2):
+            index.setdefault(name[j:j + 3], set()).add(i)
+    return index
+
+
+class _BKTree:
+    """
+    BK-tree over the normalized catalog names, keyed by Levenshtein
+    distance. The triangle inequality prunes whole subtrees per query,
+    so a lookup touches a fraction of the catalog even without any
+    shared trigram.
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self, names: List[str]):
+        # Node layout: [name, catalog index, {distance: child}]
+        self._root = None
+        for idx, name in enumerate(names):
+            self._add(name, idx)
+
+    def _add(self, name: str, idx: int):
+        if self._root is None:
+            self._root = [name, idx, {}]
+            return
+        node = self._root
+        while True:
+            dist = Levenshtein.distance(name, node[0])
+            child = node[2].get(dist)
+            if child is None:
+                node[2][dist] = [name, idx, {}]
+                return
+            node = child
+
+    def query(self, name: str, max_distance: int) -> List[Tuple[int, int]]:
+        """Return (catalog index, distance) pairs within max_distance."""
+        results = []
+        if self._root is None:
+            return results
+
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+
+            # Internal nodes need the exact distance to bound the child
+            # range, but leaves only need to know whether the distance
+            # clears the cutoff - there the bounded Wagner-Fischer
+            # variant aborts early on hopeless comparisons
+            if node[2]:
+                dist = Levenshtein.distance(name, node[0])
+                lo, hi = dist - max_distance, dist + max_distance
+                stack.extend(
+                    child for d, child in node[2].items() if lo <= d <= hi
+                )
+            else:
+                dist = Levenshtein.distance(name, node[0],
+                                            score_cutoff=max_distance)
+
+            if dist <= max_distance:
+                results.append((node[1], dist))
+        return results
+
+
+@functools.cache
+def _get_bk_tree() -> _BKTree:
+    """Build the BK-tree on the first no-trigram fuzzy fallback."""
+    return _BKTree(PRODUCT_NAMES_NORMALIZED)
+
+
+@functools.lru_cache(maxsize=2048)
+def _cached_search(query_norm: str, threshold: int) -> Tuple[int, ...]:
+    """
+    Fuzzy-match a normalized query against the catalog, returning the
+    matching catalog indices. Memoized so repeated lookups of the same
+    name (common during cart analysis loops) skip the scorer entirely.
+    """
+    # Most real queries ("milk", "airpods") are substrings of a catalog
+    # name; those short-circuit the full-catalog pass and only the few
+    # hits get scored. Ranking by score (stable, so ties keep catalog
+    # order like the baseline extract did) keeps "TV" resolving to the
+    # TV itself rather than the shortest name containing it
+    if query_norm:
+        substr_hits = [
+            i for i, name in enumerate(PRODUCT_NAMES_NORMALIZED)
+            if query_norm in name
+        ]
+        if substr_hits:
+            substr_hits.sort(
+                key=lambda i: fuzz.WRatio(query_norm, PRODUCT_NAMES_NORMALIZED[i]),
+                reverse=True,
+            )
+            return tuple(substr_hits[:5])
+
+    # Trigram prefilter: only score products sharing at least one
+    # trigram with the query. With no shared trigram the BK-tree prunes
+    # by triangle inequality instead of scanning every name; queries
+    # under 3 chars fall back to the full catalog scan
+    choices = PRODUCT_NAMES_NORMALIZED
+    if len(query_norm) >= 3:
+        trigram_index = _get_trigram_index()
+        candidates: Set[int] = set()
+        for j in range(len(query_norm) - 2):
+            candidates |= trigram_index.get(query_norm[j:j + 3], set())
+        if candidates:
+            choices = {i: PRODUCT_NAMES_NORMALIZED[i] for i in candidates}
+        else:
+            max_d = max(1, math.ceil(len(query_norm) * (100 - threshold) / 100))
+            hits = sorted(_get_bk_tree().query(query_norm, max_d),
+                          key=lambda h: h[1])
+            return tuple(idx for idx, _ in hits[:5])
+
+    # With a dict of choices the returned key is the catalog index.
+    # WRatio's token/partial passes are what let short or typo'd
+    # queries ("milkk", "air pods") clear the threshold against longer
+    # catalog names; plain InDel similarity normalizes over combined
+    # length and rejects them
+    matches = process.extract(
+        query_norm, choices,
+        scorer=fuzz.WRatio,
+        processor=None,
+        limit=5,
+        score_cutoff=threshold,
+    )
+    return tuple(idx for _, _, idx in matches)
+
 
 class WalmartMockAPI:
     """
@@ -132,17 +378,10 @@ class WalmartMockAPI:
         Returns:
             List of matching products sorted by relevance.
         """
-        matches = process.extract(query, self.product_names, limit=5)
-        results = []
-        
-        for name, score in matches:
-            if score >= threshold:
-                for product in self.catalog:
-                    if product.name == name:
-                        results.append(product)
-                        break
-        
-        return results
+        # Normalize the query once, then go through the memoized search;
+        # the returned indices line up with PRODUCT_CATALOG
+        indices = _cached_search(utils.default_process(query), threshold)
+        return [PRODUCT_CATALOG[i] for i in indices]
     
     def get_product_by_id(self, product_id: str) -> Optional[Product]:
         """
@@ -166,7 +405,7 @@ class WalmartMockAPI:
         Returns:
             List of products in the category.
         """
-        return [p for p in self.catalog if p.category.lower() == category.lower()]
+        return CATEGORY_INDEX.get(category.lower(), [])
     
     def get_price(self, product_name: str) -> Optional[float]:
         """
@@ -213,6 +452,30 @@ class WalmartMockAPI:
             return results[0].category
         return None
     
+    def bulk_lookup(self, names: List[str]) -> Dict[str, Tuple[Optional[str], bool]]:
+        """
+        Look up category and BNPL eligibility for many items in one call.
+
+        Args:
+            names: Item names to look up (fuzzy matched).
+
+        Returns:
+            Dictionary mapping each name to (category, bnpl_eligible).
+        """
+        return dict(self._bulk_lookup(tuple(sorted(set(names)))))
+
+    @functools.lru_cache(maxsize=256)
+    def _bulk_lookup(self, names: Tuple[str, ...]) -> Tuple[Tuple[str, Tuple[Optional[str], bool]], ...]:
+        """Cached single-pass lookup over a canonicalized name tuple."""
+        results = []
+        for name in names:
+            matches = self.search_product(name, threshold=70)
+            if matches:
+                results.append((name, (matches[0].category, matches[0].bnpl_eligible)))
+            else:
+                results.append((name, (None, False)))
+        return tuple(results)
+
     def lookup_items(self, item_names: List[str]) -> List[Dict]:
         """
         Look up multiple items and return their details.
@@ -223,106 +486,98 @@ class WalmartMockAPI:
         Returns:
             List of dictionaries with item details.
         """
-        results = []
-        
+        if not item_names:
+            return []
+
+        threshold = 50
+        resolved: Dict[str, Dict] = {}
+
+        # Exact ID or name hits skip the fuzzy matcher entirely - the
+        # common case for programmatic callers
+        fuzzy_names = []
         for name in item_names:
-            matches = self.search_product(name, threshold=50)
-            
-            if matches:
-                product = matches[0]
-                results.append({
+            product = PRODUCT_BY_ID.get(name) or PRODUCT_BY_NAME.get(name)
+            if product:
+                resolved[name] = {
                     "query": name,
                     "matched_product": product.name,
                     "price": product.price,
                     "category": product.category,
                     "bnpl_eligible": product.bnpl_eligible,
                     "brand": product.brand,
-                    "match_confidence": "high" if len(matches) == 1 else "medium"
-                })
+                    "match_confidence": "exact"
+                }
             else:
-                # Return estimated values for unmatched items
-                results.append({
-                    "query": name,
-                    "matched_product": None,
-                    "price": self._estimate_price(name),
-                    "category": self._guess_category(name),
-                    "bnpl_eligible": False,
-                    "brand": None,
-                    "match_confidence": "low"
-                })
-        
-        return results
+                fuzzy_names.append(name)
+
+        if fuzzy_names:
+            # One C-level N x M scoring pass (parallelized across cores)
+            # instead of a separate search per name
+            scores = process.cdist(
+                fuzzy_names, PRODUCT_NAMES_NORMALIZED,
+                scorer=fuzz.WRatio,
+                processor=utils.default_process,
+                workers=-1,
+            )
+            best_idx = np.argmax(scores, axis=1)
+            hit_counts = (scores >= threshold).sum(axis=1)
+
+            for i, name in enumerate(fuzzy_names):
+                if hit_counts[i]:
+                    product = PRODUCT_CATALOG[int(best_idx[i])]
+                    resolved[name] = {
+                        "query": name,
+                        "matched_product": product.name,
+                        "price": product.price,
+                        "category": product.category,
+                        "bnpl_eligible": product.bnpl_eligible,
+                        "brand": product.brand,
+                        "match_confidence": "high" if hit_counts[i] == 1 else "medium"
+                    }
+                else:
+                    # Return estimated values for unmatched items
+                    resolved[name] = {
+                        "query": name,
+                        "matched_product": None,
+                        "price": self._estimate_price(name),
+                        "category": self._guess_category(name),
+                        "bnpl_eligible": False,
+                        "brand": None,
+                        "match_confidence": "low"
+                    }
+
+        return [resolved[name] for name in item_names]
     
     def _estimate_price(self, item_name: str) -> float:
         """Estimate price for unknown items based on name patterns."""
-        name_lower = item_name.lower()
-        
-        # Electronics tend to be expensive
-        if any(kw in name_lower for kw in ['tv', 'laptop', 'phone', 'tablet', 'console']):
-            return 299.99
-        elif any(kw in name_lower for kw in ['cable', 'charger', 'adapter']):
-            return 14.99
-        # Baby items
-        elif any(kw in name_lower for kw in ['diaper', 'formula', 'wipes']):
-            return 24.99
-        # Food items
-        elif any(kw in name_lower for kw in ['milk', 'bread', 'eggs', 'cheese']):
-            return 4.99
-        elif any(kw in name_lower for kw in ['meat', 'chicken', 'beef', 'fish']):
-            return 8.99
-        # Default
-        else:
-            return 9.99
-    
+        m = _PRICE_BAND_RE.search(item_name.lower())
+        return _PRICE_BAND_MAP[m.lastgroup] if m else 9.99
+
     def _guess_category(self, item_name: str) -> str:
         """Guess category for unknown items based on name patterns."""
-        name_lower = item_name.lower()
-        
-        category_keywords = {
-            "Electronics": ['tv', 'laptop', 'phone', 'cable', 'charger', 'speaker', 'headphone'],
-            "Groceries": ['milk', 'bread', 'eggs', 'cheese', 'fruit', 'vegetable', 'meat', 'chicken'],
-            "Baby & Kids": ['diaper', 'baby', 'wipes', 'formula', 'toy', 'lego'],
-            "Health & Beauty": ['toothpaste', 'shampoo', 'soap', 'vitamin', 'medicine'],
-            "Household": ['paper', 'towel', 'cleaner', 'detergent', 'bag'],
-            "Clothing": ['shirt', 'pants', 'shoes', 'jacket', 'dress'],
-            "Sports": ['ball', 'yoga', 'weight', 'tent', 'fishing'],
-        }
-        
-        for category, keywords in category_keywords.items():
-            if any(kw in name_lower for kw in keywords):
-                return category
-        
-        return "General"
+        return _GUESS_CATEGORY_MATCH(item_name.lower()) or "General"
     
     def get_bnpl_eligible_items(self) -> List[Product]:
         """Get all BNPL eligible products."""
-        return [p for p in self.catalog if p.bnpl_eligible]
+        return [PRODUCT_CATALOG[i] for i in np.where(CATALOG_DF["bnpl"].values)[0]]
     
     def get_category_summary(self) -> Dict[str, Dict]:
         """Get a summary of products by category."""
-        summary = {}
-        
-        for product in self.catalog:
-            if product.category not in summary:
-                summary[product.category] = {
-                    "count": 0,
-                    "total_value": 0,
-                    "bnpl_eligible_count": 0,
-                    "avg_price": 0
-                }
-            
-            summary[product.category]["count"] += 1
-            summary[product.category]["total_value"] += product.price
-            if product.bnpl_eligible:
-                summary[product.category]["bnpl_eligible_count"] += 1
-        
-        # Calculate averages
-        for cat in summary:
-            summary[cat]["avg_price"] = round(
-                summary[cat]["total_value"] / summary[cat]["count"], 2
+        # One groupby over the contiguous SoA columns replaces the
+        # per-product dict increments and the second averaging pass
+        summary = (
+            CATALOG_DF.groupby("category")
+            .agg(
+                count=("price", "size"),
+                total_value=("price", "sum"),
+                bnpl_eligible_count=("bnpl", "sum"),
+                avg_price=("price", "mean"),
             )
-        
-        return summary
+            .astype({"count": int, "total_value": float,
+                     "bnpl_eligible_count": int, "avg_price": float})
+        )
+        summary["avg_price"] = summary["avg_price"].round(2)
+        return summary.to_dict("index")
 
 
 # Demo/test function